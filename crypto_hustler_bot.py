@@ -1,11 +1,16 @@
 import os
-import json
 import time
 import random
+import secrets
+import sqlite3
 import requests
 import bcrypt
-from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from flask import Flask, Response, request, jsonify, g
+from flask.json.provider import JSONProvider
 
 # ======================
 #  CONFIGURATIONS
@@ -15,11 +20,35 @@ from flask import Flask, request, jsonify
 NOWPAYMENTS_API_KEY = os.environ.get("NOWPAYMENTS_API_KEY")  # from env
 CURRENCY = "BTC"  # The target crypto
 
-# JSON file for user data (keeping your JSON storage approach)
+# SQLite database for user data; shared by all gunicorn workers, so no
+# user state is cached in the process
+USER_DB_FILE = os.environ.get("USER_DB_FILE", "user_data.db")
+
+# Legacy JSON user data, imported into the database once if it is empty
 USER_DATA_FILE = "user_data.json"
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and get_json."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Flask App
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# app.logger comes with Flask's stderr handler, which gunicorn captures;
+# LOG_LEVEL=DEBUG also logs full webhook payloads
+logger = app.logger
+try:
+    logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+except ValueError:
+    # Unknown level name: fall back to INFO instead of failing to start
+    logger.setLevel("INFO")
+    logger.warning("Unknown LOG_LEVEL %r, using INFO", os.environ["LOG_LEVEL"])
 
 # Mining interval (in minutes)
 MINING_INTERVAL = 10
@@ -27,78 +56,208 @@ MINING_INTERVAL = 10
 # Slot machine cost per spin (in BTC)
 SLOT_MACHINE_COST = 0.0001
 
+# Slot machine reel symbols
+SLOT_SYMBOLS = ("A", "B", "C", "D", "7", "X")
+
+# Game RNG (rewards, reels, quiz picks) - not for anything security related
+_RNG = random.Random()
+
+# bcrypt work factor; each +1 doubles hashing time (library default is 12).
+# bcrypt releases the GIL, so hashes on gunicorn's worker threads run in parallel.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 10))
+
+# bcrypt only uses the first 72 bytes of a password
+MAX_PASSWORD_BYTES = 72
+
 # ======================
 #  HELPER FUNCTIONS
 # ======================
 
-def load_user_data():
-    """Load users from JSON file."""
+USERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    balance REAL NOT NULL DEFAULT 0,
+    session_token TEXT UNIQUE,
+    last_passive_mine REAL NOT NULL,
+    next_quiz_attempt REAL NOT NULL,
+    slot_machine_unlocked INTEGER NOT NULL DEFAULT 0,
+    first_deposit INTEGER,
+    current_question_index INTEGER
+)
+"""
+
+# Timestamp fields stored as Unix epoch floats
+TIMESTAMP_FIELDS = ("last_passive_mine", "next_quiz_attempt")
+
+def _connect_db():
+    """Open a connection to the user database."""
+    # Autocommit mode; read-modify-write code opens explicit transactions
+    conn = sqlite3.connect(USER_DB_FILE, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def get_db():
+    """Return the database connection for the current request."""
+    if "db" not in g:
+        g.db = _connect_db()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exc):
+    """Close the request's database connection, if one was opened."""
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+@app.before_request
+def parse_json_body():
+    """Parse a JSON request body once with orjson and keep it on flask.g.json."""
+    if request.is_json:
+        try:
+            g.json = orjson.loads(request.get_data() or b"{}")
+        except orjson.JSONDecodeError:
+            return jsonify({"error": "Invalid JSON body"}), 400
+
+@contextmanager
+def user_transaction():
+    """Run a read-modify-write on the users table as one write transaction."""
+    db = get_db()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+def _read_user_data_file():
+    """Read users from the legacy JSON file on disk."""
     try:
-        with open(USER_DATA_FILE, "r") as f:
-            return json.load(f)
+        with open(USER_DATA_FILE, "rb") as f:
+            users = orjson.loads(f.read() or b"{}")
     except FileNotFoundError:
         return {}
-
-def save_user_data(data):
-    """Save users to JSON file."""
-    with open(USER_DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    # Convert records saved in older formats: ISO timestamps become epoch floats
+    for user in users.values():
+        for field in TIMESTAMP_FIELDS:
+            if isinstance(user.get(field), str):
+                user[field] = datetime.fromisoformat(user[field]).timestamp()
+    return users
+
+def init_db():
+    """Create the users table (WAL mode) and import user_data.json if the table is empty."""
+    conn = _connect_db()
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(USERS_SCHEMA)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        if not conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (id, email, password, balance, session_token, "
+                "last_passive_mine, next_quiz_attempt, slot_machine_unlocked, first_deposit) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (int(uid), u["email"], u["password"], u.get("balance", 0.0), u.get("session_token"),
+                     u.get("last_passive_mine", now), u.get("next_quiz_attempt", now),
+                     bool(u.get("slot_machine_unlocked")), u.get("first_deposit"))
+                    for uid, u in _read_user_data_file().items()
+                ],
+            )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+init_db()
 
 def hash_password(password):
     """Hash a plaintext password."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
 
 def verify_password(password, hashed_password):
     """Verify a plaintext password against a hashed password."""
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
 
-def generate_session_token(user_id):
+def verify_password_batch(pairs, max_workers=None):
+    """
+    Verify many (password, hashed_password) pairs in parallel, e.g. for load
+    tests or offline checks. Returns a list of bools in input order.
+    bcrypt releases the GIL while hashing, so threads scale with CPU cores;
+    per-hash cost is set by BCRYPT_ROUNDS.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(lambda pair: verify_password(*pair), pairs))
+
+# Checked against on unknown emails so /login takes the same time either way.
+# Accounts still stored at the old cost of 12 reject slower until their lazy rehash.
+_DUMMY_HASH = bcrypt.hashpw(b"dummy-password", bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+def cost_matches(hashed_password):
+    """Return True if a bcrypt hash ($2b$<cost>$...) uses the current BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split(b"$")[2]) == BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def generate_session_token():
     """Generate a random session token."""
-    return os.urandom(24).hex()
+    return secrets.token_hex(24)
 
 def get_user_by_session_token(session_token):
     """Return (user_id, user_data) given a valid session token, or (None, None) if invalid."""
-    users = load_user_data()
-    for uid, data in users.items():
-        if data.get("session_token") == session_token:
-            return uid, data
-    return None, None
+    row = get_db().execute("SELECT * FROM users WHERE session_token = ?", (session_token,)).fetchone()
+    if row is None:
+        return None, None
+    return row["id"], row
 
 def get_user_by_id(user_id):
     """Return user data for a given user_id (string or int)."""
-    users = load_user_data()
-    return users.get(str(user_id), None)
+    return get_db().execute("SELECT * FROM users WHERE id = ?", (int(user_id),)).fetchone()
 
 def update_user_balance(user_id, amount):
     """Update user balance after deposit or bonus."""
-    users = load_user_data()
-    user_id_str = str(user_id)
-    if user_id_str in users:
-        # First deposit bonus check
-        if "first_deposit" not in users[user_id_str]:
-            users[user_id_str]["balance"] += amount * 2
-            users[user_id_str]["first_deposit"] = True
-            print(f"✅ Added {amount * 2} {CURRENCY} (bonus) to user {user_id}. New balance: {users[user_id_str]['balance']}")
-        else:
-            users[user_id_str]["balance"] += amount
-            print(f"✅ Added {amount} {CURRENCY} to user {user_id}. New balance: {users[user_id_str]['balance']}")
-        save_user_data(users)
-        return True
-    else:
-        print(f"Error: User {user_id} does not exist.")
+    try:
+        user_id_int = int(user_id)
+    except (TypeError, ValueError):
+        user_id_int = None
+    with user_transaction() as db:
+        row = db.execute("SELECT first_deposit FROM users WHERE id = ?", (user_id_int,)).fetchone()
+        if row is not None:
+            # First deposit bonus check (only records without the flag get it)
+            if row["first_deposit"] is None:
+                credit = amount * 2
+                db.execute("UPDATE users SET balance = balance + ?, first_deposit = 1 WHERE id = ?", (credit, user_id_int))
+            else:
+                credit = amount
+                db.execute("UPDATE users SET balance = balance + ? WHERE id = ?", (credit, user_id_int))
+            balance = db.execute("SELECT balance FROM users WHERE id = ?", (user_id_int,)).fetchone()["balance"]
+    if row is None:
+        logger.warning("Deposit for unknown user %s", user_id)
         return False
+    if row["first_deposit"] is None:
+        logger.info("Added %s %s (bonus) to user %s. New balance: %s", credit, CURRENCY, user_id, balance)
+    else:
+        logger.info("Added %s %s to user %s. New balance: %s", credit, CURRENCY, user_id, balance)
+    return True
 
 # ======================
 #  NOWPAYMENTS INTEGRATION
 # ======================
 
+# Shared session so repeat deposits reuse the pooled TCP/TLS connection
+_NP_SESSION = requests.Session()
+_NP_SESSION.headers.update({
+    "x-api-key": NOWPAYMENTS_API_KEY,
+    "Content-Type": "application/json",
+})
+_NP_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
 def generate_payment_address(user_id, amount, currency="EUR"):
     """Generate a NOWPayments invoice URL for deposit."""
     url = "https://api.nowpayments.io/v1/invoice"
-    headers = {
-        "x-api-key": NOWPAYMENTS_API_KEY,
-        "Content-Type": "application/json",
-    }
     payload = {
         "price_amount": amount,
         "price_currency": currency,
@@ -106,9 +265,14 @@ def generate_payment_address(user_id, amount, currency="EUR"):
         "order_id": str(user_id),
         "order_description": "CryptoHustler Deposit",
     }
-    response = requests.post(url, headers=headers, json=payload)
-    data = response.json()
-    if "invoice_url" in data:
+    try:
+        response = _NP_SESSION.post(url, json=payload, timeout=5)
+        data = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        # Timeouts, connection errors and non-JSON replies all mean no invoice
+        logger.warning("NOWPayments invoice request failed for user %s: %s", user_id, exc)
+        return None
+    if isinstance(data, dict) and "invoice_url" in data:
         return data["invoice_url"]
     else:
         return None
@@ -116,12 +280,14 @@ def generate_payment_address(user_id, amount, currency="EUR"):
 @app.route("/webhook", methods=["POST"])
 def nowpayments_webhook():
     """NOWPayments webhook to confirm deposits."""
-    data = request.get_json()
-    print("Webhook received:", json.dumps(data, indent=4))
+    data = g.get("json", {})
+    logger.debug("Webhook received: %s", data)
 
     if not data or "order_id" not in data or "payment_status" not in data:
         return jsonify({"error": "Invalid data"}), 400
 
+    logger.info("Webhook for order %s: %s", data["order_id"], data["payment_status"])
+
     user_id = data["order_id"]  # This was stored as a string
     amount_received = float(data["pay_amount"])
     # currency = data["pay_currency"]  # We can log it if needed.
@@ -140,59 +306,67 @@ def nowpayments_webhook():
 @app.route("/register", methods=["POST"])
 def register_user():
     """Register a new user."""
-    data = request.get_json()
+    data = g.get("json", {})
     email = data.get("email")
     password = data.get("password")
 
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    users = load_user_data()
-    # Check if email is already registered
-    for uid, user_data in users.items():
-        if user_data.get("email") == email:
-            return jsonify({"error": "Email already registered"}), 400
+    if len(password.encode('utf-8')) > MAX_PASSWORD_BYTES:
+        return jsonify({"error": f"Password must be at most {MAX_PASSWORD_BYTES} bytes"}), 400
 
-    user_id = len(users) + 1
     hashed_pw = hash_password(password).decode('utf-8')
 
-    users[str(user_id)] = {
-        "email": email,
-        "password": hashed_pw,
-        "balance": 0.0,
-        "session_token": generate_session_token(user_id),
-        "last_passive_mine": datetime.now().isoformat(),
-        "next_quiz_attempt": datetime.now().isoformat(),
-        "slot_machine_unlocked": False,
-        "first_deposit": False  # track if deposit bonus used
-    }
-    save_user_data(users)
+    session_token = generate_session_token()
+    now = time.time()
+    try:
+        get_db().execute(
+            "INSERT INTO users (email, password, balance, session_token, last_passive_mine, "
+            "next_quiz_attempt, slot_machine_unlocked, first_deposit) VALUES (?, ?, 0.0, ?, ?, ?, 0, 0)",
+            # first_deposit tracks if deposit bonus used
+            (email, hashed_pw, session_token, now, now),
+        )
+    except sqlite3.IntegrityError:
+        # Email is already registered
+        return jsonify({"error": "Email already registered"}), 400
 
     return jsonify({
         "message": "User registered successfully",
-        "session_token": users[str(user_id)]["session_token"]
+        "session_token": session_token
     }), 201
 
 @app.route("/login", methods=["POST"])
 def login_user():
     """Login an existing user."""
-    data = request.get_json()
+    data = g.get("json", {})
     email = data.get("email")
     password = data.get("password")
 
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    users = load_user_data()
-    for uid, user_data in users.items():
-        if user_data.get("email") == email:
-            # Verify password
-            if verify_password(password, user_data["password"].encode('utf-8')):
-                # Generate new session token
-                new_token = generate_session_token(uid)
-                users[uid]["session_token"] = new_token
-                save_user_data(users)
-                return jsonify({"message": "Login successful", "session_token": new_token}), 200
+    # Reject oversized input before doing any bcrypt work
+    if len(password.encode('utf-8')) > MAX_PASSWORD_BYTES:
+        return jsonify({"error": "Invalid email or password"}), 401
+
+    user_data = get_db().execute("SELECT id, password FROM users WHERE email = ?", (email,)).fetchone()
+    if not user_data:
+        # Burn the same hashing time as a real check to avoid an email oracle
+        verify_password(password, _DUMMY_HASH)
+    else:
+        # Verify password
+        hashed_pw = user_data["password"].encode('utf-8')
+        if verify_password(password, hashed_pw):
+            # Generate new session token
+            new_token = generate_session_token()
+            # Lazily rehash passwords stored with an older work factor
+            new_hash = None if cost_matches(hashed_pw) else hash_password(password).decode('utf-8')
+            get_db().execute(
+                "UPDATE users SET session_token = ?, password = COALESCE(?, password) WHERE id = ?",
+                (new_token, new_hash, user_data["id"]),
+            )
+            return jsonify({"message": "Login successful", "session_token": new_token}), 200
 
     return jsonify({"error": "Invalid email or password"}), 401
 
@@ -203,12 +377,9 @@ def logout_user():
     if not session_token:
         return jsonify({"error": "Session token required"}), 401
 
-    users = load_user_data()
-    for uid, user_data in users.items():
-        if user_data["session_token"] == session_token:
-            users[uid]["session_token"] = None
-            save_user_data(users)
-            return jsonify({"message": "Logged out successfully"}), 200
+    cur = get_db().execute("UPDATE users SET session_token = NULL WHERE session_token = ?", (session_token,))
+    if cur.rowcount:
+        return jsonify({"message": "Logged out successfully"}), 200
 
     return jsonify({"error": "Invalid session token"}), 401
 
@@ -293,26 +464,27 @@ def tasks_command():
 #  PASSIVE MINING
 # ======================
 
+# Progress bar is constant, so build it once at import time
+_MINING_PROGRESS = "\n".join([
+    "[=         ] 10%",
+    "[==        ] 20%",
+    "[===       ] 30%",
+    "[====      ] 40%",
+    "[=====     ] 50%",
+    "[======    ] 60%",
+    "[=======   ] 70%",
+    "[========  ] 80%",
+    "[========= ] 90%",
+    "[==========] 100%"
+])
+
 def mining_ascii_progress():
     """
     Returns a simple ASCII progress bar or animation string.
     In a real Telegram bot scenario, you'd update messages incrementally,
     but here we just return a final string.
     """
-    bar = [
-        "[=         ] 10%",
-        "[==        ] 20%",
-        "[===       ] 30%",
-        "[====      ] 40%",
-        "[=====     ] 50%",
-        "[======    ] 60%",
-        "[=======   ] 70%",
-        "[========  ] 80%",
-        "[========= ] 90%",
-        "[==========] 100%"
-    ]
-    # Join into a single string with line breaks
-    return "\n".join(bar)
+    return _MINING_PROGRESS
 
 @app.route("/mine", methods=["POST"])
 def mine_command():
@@ -328,31 +500,35 @@ def mine_command():
     if not user_id:
         return jsonify({"error": "Invalid session token"}), 401
 
-    last_mine_time = datetime.fromisoformat(user_data["last_passive_mine"])
-    now = datetime.now()
-
-    # Check if enough time has passed
-    if now - last_mine_time >= timedelta(minutes=MINING_INTERVAL):
-        # Calculate random mining reward
-        mined_amount = random.uniform(0.0001, 0.001)
-        # Update balance
-        users = load_user_data()
-        users[user_id]["balance"] += mined_amount
-        # Update last_mine time
-        users[user_id]["last_passive_mine"] = now.isoformat()
-        save_user_data(users)
-
+    now = time.time()
+    with user_transaction() as db:
+        row = db.execute("SELECT balance, last_passive_mine FROM users WHERE id = ?", (user_id,)).fetchone()
+        last_mine_time = row["last_passive_mine"]
+        # Check if enough time has passed
+        can_mine = now - last_mine_time >= MINING_INTERVAL * 60
+        if can_mine:
+            # Calculate random mining reward
+            mined_amount = _RNG.uniform(0.0001, 0.001)
+            # Update balance and last_mine time
+            db.execute(
+                "UPDATE users SET balance = balance + ?, last_passive_mine = ? WHERE id = ?",
+                (mined_amount, now, user_id),
+            )
+            new_balance = row["balance"] + mined_amount
+
+    if can_mine:
         progress_bar = mining_ascii_progress()
         return jsonify({
             "animation": progress_bar,
             "message": f"Mining complete! You have mined {mined_amount:.6f} {CURRENCY}.",
-            "new_balance": users[user_id]["balance"]
+            "new_balance": new_balance
         }), 200
     else:
         # Not enough time has passed
-        remaining = (last_mine_time + timedelta(minutes=MINING_INTERVAL)) - now
+        remaining = int(MINING_INTERVAL * 60 - (now - last_mine_time))
+        minutes, seconds = divmod(remaining, 60)
         return jsonify({
-            "error": f"You must wait {remaining.seconds//60} minutes and {remaining.seconds%60} seconds before mining again."
+            "error": f"You must wait {minutes} minutes and {seconds} seconds before mining again."
         }), 400
 
 # ======================
@@ -360,7 +536,7 @@ def mine_command():
 # ======================
 
 # Simple local question generator mimicking AI dynamic generation
-QUIZ_QUESTIONS = [
+QUIZ_QUESTIONS = (
     {
         "question": "Which of the following is the first decentralized cryptocurrency?",
         "options": ["Ethereum", "Bitcoin", "Litecoin", "Ripple"],
@@ -396,11 +572,17 @@ QUIZ_QUESTIONS = [
         ],
         "answer_index": 1
     },
-]
+)
+
+# Ready-to-send GET /quiz bodies, one per question (answers left out)
+_QUIZ_RESPONSES = tuple(
+    orjson.dumps({"question": q["question"], "options": q["options"]})
+    for q in QUIZ_QUESTIONS
+)
 
 def get_random_quiz_question():
-    """Return a random question dict from QUIZ_QUESTIONS."""
-    return random.choice(QUIZ_QUESTIONS)
+    """Return the index of a random question in QUIZ_QUESTIONS."""
+    return _RNG.randrange(len(QUIZ_QUESTIONS))
 
 @app.route("/quiz", methods=["GET", "POST"])
 def quiz_command():
@@ -417,72 +599,84 @@ def quiz_command():
     if not user_id:
         return jsonify({"error": "Invalid session token"}), 401
 
-    users = load_user_data()
     if request.method == "GET":
         # Check cooldown
-        next_attempt_time = datetime.fromisoformat(user_data["next_quiz_attempt"])
-        now = datetime.now()
-        if now < next_attempt_time:
-            wait_seconds = (next_attempt_time - now).seconds
-            return jsonify({
-                "error": f"You are on a cooldown. Please wait {wait_seconds} seconds before trying again."
-            }), 400
-
-        # Generate a random question
-        question_data = get_random_quiz_question()
-        # Store it on user data so we can check on POST
-        users[user_id]["current_question"] = question_data
-        # Save
-        save_user_data(users)
-
+        next_attempt_time = user_data["next_quiz_attempt"]
+        now = time.time()
+        if now >= next_attempt_time:
+            # Generate a random question
+            question_index = get_random_quiz_question()
+            # Store it on user data so we can check on POST; the cooldown is
+            # re-checked in the same statement in case a wrong answer just set one
+            cur = get_db().execute(
+                "UPDATE users SET current_question_index = ? WHERE id = ? AND next_quiz_attempt <= ?",
+                (question_index, user_id, now),
+            )
+            if cur.rowcount:
+                return Response(_QUIZ_RESPONSES[question_index], status=200, mimetype="application/json")
+            next_attempt_time = get_db().execute(
+                "SELECT next_quiz_attempt FROM users WHERE id = ?", (user_id,)
+            ).fetchone()["next_quiz_attempt"]
+
+        wait_seconds = int(next_attempt_time - now)
         return jsonify({
-            "question": question_data["question"],
-            "options": question_data["options"]
-        }), 200
+            "error": f"You are on a cooldown. Please wait {wait_seconds} seconds before trying again."
+        }), 400
 
     elif request.method == "POST":
-        data = request.get_json()
+        data = g.get("json", {})
         chosen_index = data.get("chosen_index")
 
-        if "current_question" not in users[user_id]:
+        if user_data["current_question_index"] is None:
             return jsonify({"error": "No active quiz question. Please GET /quiz first."}), 400
 
-        current_q = users[user_id]["current_question"]
-
         # Basic validation
         if chosen_index is None or not isinstance(chosen_index, int):
             return jsonify({"error": "Invalid answer index."}), 400
 
-        if chosen_index == current_q["answer_index"]:
-            # Correct answer
-            reward = random.uniform(0.00001, 0.00005)  # Adjust your reward
-            users[user_id]["balance"] += reward
-            # Clear current question and cooldown only if correct to allow immediate new question
-            del users[user_id]["current_question"]
-            # Save
-            save_user_data(users)
+        with user_transaction() as db:
+            # Take the question inside the transaction so one question pays out only once
+            row = db.execute("SELECT balance, current_question_index FROM users WHERE id = ?", (user_id,)).fetchone()
+            question_index = row["current_question_index"]
+            if not isinstance(question_index, int) or not 0 <= question_index < len(QUIZ_QUESTIONS):
+                return jsonify({"error": "No active quiz question. Please GET /quiz first."}), 400
+            current_q = QUIZ_QUESTIONS[question_index]
+
+            correct = chosen_index == current_q["answer_index"]
+            if correct:
+                # Correct answer; no cooldown so a new question can be fetched immediately
+                reward = _RNG.uniform(0.00001, 0.00005)  # Adjust your reward
+                db.execute(
+                    "UPDATE users SET balance = balance + ?, current_question_index = NULL WHERE id = ?",
+                    (reward, user_id),
+                )
+                new_balance = row["balance"] + reward
+            else:
+                # Incorrect - impose cooldown (e.g. 1 minute)
+                cooldown_minutes = 1
+                next_time = time.time() + cooldown_minutes * 60
+                db.execute(
+                    "UPDATE users SET next_quiz_attempt = ?, current_question_index = NULL WHERE id = ?",
+                    (next_time, user_id),
+                )
+
+        if correct:
             return jsonify({
                 "message": f"Correct! You earned {reward:.8f} {CURRENCY}.",
-                "new_balance": users[user_id]["balance"]
+                "new_balance": new_balance
             }), 200
         else:
-            # Incorrect - impose cooldown (e.g. 1 minute)
-            cooldown_minutes = 1
-            next_time = datetime.now() + timedelta(minutes=cooldown_minutes)
-            users[user_id]["next_quiz_attempt"] = next_time.isoformat()
-            # Clear question
-            if "current_question" in users[user_id]:
-                del users[user_id]["current_question"]
-            save_user_data(users)
             return jsonify({
                 "message": "Incorrect answer. You must wait before trying again.",
-                "cooldown_until": next_time.isoformat()
+                "cooldown_until": next_time
             }), 200
 
 # ======================
 #  SLOT MACHINE GAME
 # ======================
 
+_SLOT_FMT = ("-" * 13) + "\n| {} | {} | {} |\n" + ("-" * 13)
+
 def slot_machine_ascii(reels):
     """
     Returns an ASCII representation of the slot reels, e.g.:
@@ -491,8 +685,7 @@ def slot_machine_ascii(reels):
     | A | B | C |
     -------------
     """
-    top_bottom = "-" * 13
-    return f"{top_bottom}\n| {reels[0]} | {reels[1]} | {reels[2]} |\n{top_bottom}"
+    return _SLOT_FMT.format(*reels)
 
 @app.route("/slots", methods=["POST"])
 def slots_command():
@@ -516,37 +709,39 @@ def slots_command():
     if user_data["balance"] < SLOT_MACHINE_COST:
         return jsonify({"error": f"Insufficient balance. You need at least {SLOT_MACHINE_COST} {CURRENCY}."}), 400
 
-    symbols = ["A", "B", "C", "D", "7", "X"]
-    # Deduct cost
-    users = load_user_data()
-    users[user_id]["balance"] -= SLOT_MACHINE_COST
-
     # Spin reels
-    reel_results = [random.choice(symbols) for _ in range(3)]
+    reel_results = _RNG.choices(SLOT_SYMBOLS, k=3)
 
-    # Check outcome
-    if reel_results[0] == reel_results[1] == reel_results[2]:
+    # Check outcome: 1 distinct symbol = 3 match, 2 distinct = 2 match
+    distinct = len(set(reel_results))
+    if distinct == 1:
         # JACKPOT
-        jackpot_prize = random.uniform(0.001, 0.002)  # Adjust jackpot range
-        users[user_id]["balance"] += jackpot_prize
-        outcome = f"JACKPOT! You win {jackpot_prize:.6f} {CURRENCY}!"
-    elif reel_results[0] == reel_results[1] or reel_results[1] == reel_results[2] or reel_results[0] == reel_results[2]:
+        prize = _RNG.uniform(0.001, 0.002)  # Adjust jackpot range
+        outcome = f"JACKPOT! You win {prize:.6f} {CURRENCY}!"
+    elif distinct == 2:
         # SMALL WIN
-        small_win = random.uniform(0.00005, 0.0001)
-        users[user_id]["balance"] += small_win
-        outcome = f"You matched 2 symbols! You win {small_win:.6f} {CURRENCY}."
+        prize = _RNG.uniform(0.00005, 0.0001)
+        outcome = f"You matched 2 symbols! You win {prize:.6f} {CURRENCY}."
     else:
         # LOSS
+        prize = 0.0
         outcome = "No match. Better luck next time!"
 
-    save_user_data(users)
+    # Deduct cost and add winnings in one write
+    with user_transaction() as db:
+        balance = db.execute("SELECT balance FROM users WHERE id = ?", (user_id,)).fetchone()["balance"]
+        # Re-check: another spin may have spent the balance meanwhile
+        if balance < SLOT_MACHINE_COST:
+            return jsonify({"error": f"Insufficient balance. You need at least {SLOT_MACHINE_COST} {CURRENCY}."}), 400
+        db.execute("UPDATE users SET balance = balance + ? WHERE id = ?", (prize - SLOT_MACHINE_COST, user_id))
+        new_balance = balance + prize - SLOT_MACHINE_COST
 
     ascii_art = slot_machine_ascii(reel_results)
     return jsonify({
         "animation": ascii_art,
         "result": reel_results,
         "outcome": outcome,
-        "new_balance": users[user_id]["balance"]
+        "new_balance": new_balance
     }), 200
 
 # ======================
@@ -566,7 +761,7 @@ def deposit_command():
     if not user_id:
         return jsonify({"error": "Invalid session token"}), 401
 
-    data = request.get_json()
+    data = g.get("json", {})
     amount = data.get("amount", 0)
 
     if amount <= 0:
@@ -602,17 +797,15 @@ def user_info():
         "balance": user_data["balance"],
         "last_passive_mine": user_data["last_passive_mine"],
         "next_quiz_attempt": user_data["next_quiz_attempt"],
-        "slot_machine_unlocked": user_data["slot_machine_unlocked"]
+        "slot_machine_unlocked": bool(user_data["slot_machine_unlocked"])
     }), 200
 
 # ======================
 #  MAIN
 # ======================
 
-import os
-
-import os
-
+# Production runs under gunicorn with threaded workers (see Procfile);
+# this entry point is only for local development.
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))  # Pobieramy port z Render
-    app.run(host="0.0.0.0", port=port)
+    app.run(host="0.0.0.0", port=port, threaded=True)